@@ -2,14 +2,24 @@
 Streamlit Mini PDF-Q&A – ✨ POLISHED UI EDITION
 All internship requirements still satisfied (see inline comments).
 """
+import os
+
+# use every core for the BLAS/OpenMP pools, FAISS search included (must be set before torch / faiss / onnxruntime load)
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count()))
+os.environ.setdefault("MKL_NUM_THREADS", str(os.cpu_count()))
+
 import streamlit as st
-from openai import OpenAI
-from PyPDF2 import PdfReader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
+from pathlib import Path
+import hashlib
+import io
+import json
+import queue
+import threading
 import time
 
+# heavy deps (torch, faiss, langchain, openai, PyPDF2) are imported inside the functions that use them,
+# so the first page render doesn't wait on them and UI-only reruns never touch them
+
 # ---------- PAGE CONFIG ----------
 st.set_page_config(
     page_title="PDF AI Assistant",
@@ -120,27 +130,221 @@ except Exception:
     st.stop()
 
 # ---------- UTILS ----------
-@st.cache_data(show_spinner=False)
-def parse_pdf(file):
-    reader = PdfReader(file)
-    text = "\n".join(page.extract_text() or "" for page in reader.pages)
-    return text, len(reader.pages)
+CACHE_DIR = Path("cache")
+INDEX_VERSION = 2  # bump when the on-disk index layout changes (2: small-to-big child/parent chunks)
+BASE_URL = "https://api.chatanywhere.tech/v1"
+KEEPALIVE_S = 5.0  # httpx default idle-connection expiry
+EMBED_BATCH = 64
+SORT_WINDOW = 4 * EMBED_BATCH  # chunks length-sorted together before batching
+PIPELINE_DEPTH = 4  # bounded queues: a fast stage can't run arbitrarily far ahead
+PIPELINE_DONE = object()
+# core budget while indexing: extraction processes and the ONNX Runtime pool run at the same time, so they
+# split the cores instead of each taking all of them; extraction is cheap next to the transformer forward pass
+EXTRACT_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+EMBED_THREADS = max(1, (os.cpu_count() or 1) - EXTRACT_WORKERS)
+
+@st.cache_resource(show_spinner=False)
+def get_http_client():
+    from openai import DefaultHttpxClient
+    # the SDK's own defaults (pool limits, timeouts, redirects); shared so warm_connection fills the same pool
+    return DefaultHttpxClient()
+
+@st.cache_resource(show_spinner=False)
+def get_client():
+    from openai import OpenAI
+    # one client per process → httpx connection pool (TLS keep-alive) survives across chat turns
+    return OpenAI(api_key=openai_key, base_url=BASE_URL, http_client=get_http_client())
+
+def warm_connection(http):
+    import httpx
+    # open (TCP + TLS) a pooled connection to the API host; the status code is irrelevant
+    try:
+        http.head(BASE_URL, timeout=2.0)
+    except httpx.HTTPError:
+        pass
 
 @st.cache_resource(show_spinner=False)
 def get_embeddings():
-    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    # CPU → INT8 ONNX (default); EMBEDDINGS_BACKEND=torch → FP16 + FlashAttention on a CUDA GPU.
+    # Opt-in rather than auto-detected: probing for CUDA would mean importing torch on every CPU host
+    backend = os.environ.get("EMBEDDINGS_BACKEND", "onnx")
+    if backend not in ("onnx", "torch"):
+        raise ValueError(f"EMBEDDINGS_BACKEND must be 'onnx' or 'torch', got {backend!r}")
+    if backend == "torch":
+        from torch_embeddings import TorchMiniLMEmbeddings
+        return TorchMiniLMEmbeddings()
+    from onnx_embeddings import OnnxMiniLMEmbeddings
+    return OnnxMiniLMEmbeddings(intra_op_threads=EMBED_THREADS)
+
+def drain(q):
+    # unblock an upstream stage after a downstream failure
+    while q.get() is not PIPELINE_DONE:
+        pass
+
+def build_vectorstore(data, on_progress=None):
+    import numpy as np
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+    from pdf_extract import count_pages, iter_pages
+    from regex_splitter import RegexTextSplitter
+
+    # pipelined: extract pages → split → embed run concurrently, connected by bounded queues
+    parent_splitter = RegexTextSplitter(chunk_size=1000, chunk_overlap=200)
+    child_splitter = RegexTextSplitter(chunk_size=256, chunk_overlap=32)
+    n_pages = count_pages(data)
+    page_q = queue.Queue(maxsize=PIPELINE_DEPTH)
+    batch_q = queue.Queue(maxsize=PIPELINE_DEPTH)
+    parents, chunks, chunk_parent, errors = [], [], [], []
+    pages_read = 0
+
+    def extract():
+        try:
+            for page in iter_pages(data, max_workers=EXTRACT_WORKERS):
+                page_q.put(page)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            page_q.put(PIPELINE_DONE)
+
+    def emit(ids):
+        # smart batching: length-sorted within the window so each batch pads to ~uniform length
+        ids.sort(key=lambda i: len(chunks[i]))
+        for start in range(0, len(ids), EMBED_BATCH):
+            batch_q.put(ids[start:start + EMBED_BATCH])
+
+    def split():
+        nonlocal pages_read
+        window, page = [], None
+        try:
+            # page by page – no giant joined string held alongside the chunks
+            while (page := page_q.get()) is not PIPELINE_DONE:
+                pages_read += 1
+                for parent in parent_splitter.split_text(page):
+                    parents.append(parent)
+                    # small-to-big: only 256-char children are embedded + searched; the LLM gets their 1000-char parent
+                    for child in child_splitter.split_text(parent):
+                        window.append(len(chunks))
+                        chunk_parent.append(len(parents) - 1)
+                        chunks.append(child)
+                if len(window) >= SORT_WINDOW:
+                    emit(window)
+                    window = []
+            emit(window)
+        except Exception as e:
+            errors.append(e)
+            if page is not PIPELINE_DONE:
+                drain(page_q)
+        finally:
+            batch_q.put(PIPELINE_DONE)
+
+    # load (first call: export/download) the model before any stage starts – if it fails, nothing is left blocked
+    embedding = get_embeddings()
+    for stage in (extract, split):
+        threading.Thread(target=stage, daemon=True).start()
+
+    ids, parts, progress = [], [], 0.0
+    try:
+        while (batch := batch_q.get()) is not PIPELINE_DONE:
+            parts.append(embedding.encode([chunks[i] for i in batch], batch_size=EMBED_BATCH))
+            ids.extend(batch)
+            if on_progress:
+                # estimate: share of pages read × share of their chunks embedded (kept monotone)
+                progress = max(progress, min(1.0, pages_read / max(n_pages, 1) * len(ids) / len(chunks)))
+                on_progress(progress)
+    except Exception:
+        drain(batch_q)
+        raise
+    if errors:
+        raise errors[0]
+    if not chunks:
+        raise ValueError("no extractable text in this PDF")
 
-@st.cache_data(show_spinner=False)
-def build_vectorstore(text):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    chunks = splitter.split_text(text)
-    vs = FAISS.from_texts(chunks, get_embeddings())
-    return vs, len(chunks)
+    # restore chunk order
+    embs = np.empty((len(ids), parts[0].shape[1]), dtype=np.float32)
+    embs[ids] = np.vstack(parts)
+    # hand the float32 matrix straight to FAISS – no List[List[float]] round-trip, no throwaway flat index
+    # every child references the same parent str object, so memory (and the pickle on disk) holds each parent once
+    docstore = InMemoryDocstore({
+        str(i): Document(page_content=c, metadata={"parent_id": pid, "parent": parents[pid]})
+        for i, (pid, c) in enumerate(zip(chunk_parent, chunks))
+    })
+    vs = FAISS(embedding, build_index(embs), docstore, {i: str(i) for i in range(len(chunks))})
+    return vs, {"pages": n_pages, "chunks": len(chunks)}
+
+def build_index(vectors):
+    import faiss
+    # small PDFs → HNSW graph over fp16 vectors; large ones → IVF + 4-bit PQ (FastScan) instead of brute-force flat L2
+    # (vectors are L2-normalized, so L2 ranks exactly like inner product / cosine)
+    dim = vectors.shape[1]
+    if len(vectors) < 500:
+        index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_fp16, 32)
+        index.hnsw.efConstruction = 200
+        index.hnsw.efSearch = 64
+        index.train(vectors)
+        index.add(vectors)
+    else:
+        index = faiss.index_factory(dim, "IVF32,PQ16x4fs", faiss.METRIC_L2)
+        index.train(vectors)
+        index.nprobe = 4
+        index.add(vectors)
+        index.make_direct_map()  # MMR re-ranking reconstructs candidate vectors by id
+    return index
+
+def index_key(data):
+    return f"v{INDEX_VERSION}-{hashlib.blake2b(data, digest_size=16).hexdigest()}"
+
+# cache_resource: a re-upload in the same process gets the very same FAISS object back
+# (no disk unpickle, no rebuild); the on-disk copy keyed by content hash covers restarts
+@st.cache_resource(show_spinner=False)
+def load_or_build_vectorstore(key, _data, _on_progress=None):
+    path = CACHE_DIR / key
+    if (path / "stats.json").exists():
+        from langchain_community.vectorstores import FAISS
+        vs = FAISS.load_local(str(path), get_embeddings(), allow_dangerous_deserialization=True)
+        return vs, json.loads((path / "stats.json").read_text())
+
+    vs, stats = build_vectorstore(_data, on_progress=_on_progress)
+    vs.save_local(str(path))
+    (path / "stats.json").write_text(json.dumps(stats))
+    return vs, stats
+
+def start_indexing(file):
+    # embed in a background thread so the script (and chat history) keeps rendering meanwhile;
+    # the thread only touches this plain dict – st.session_state is script-thread only
+    job = {
+        "file_id": file.file_id, "progress": 0.0, "done": threading.Event(),
+        "vs": None, "stats": None, "error": None,
+    }
+
+    def run():
+        try:
+            data = file.getvalue()
+            job["vs"], job["stats"] = load_or_build_vectorstore(
+                index_key(data), data, _on_progress=lambda p: job.update(progress=p),
+            )
+        except Exception as e:
+            job["error"] = e
+        finally:
+            job["done"].set()
+
+    threading.Thread(target=run, daemon=True).start()
+    return job
+
+@st.fragment(run_every=0.5)
+def indexing_progress():
+    # polls only while the job runs; once done, a full rerun installs the index (or shows the error)
+    # and no longer renders this fragment, which stops the polling
+    job = st.session_state.job
+    if job is None or job["done"].is_set():
+        st.rerun()
+    st.progress(job["progress"], text="Parsing & embedding…")
 
 # ---------- SESSION ----------
-for k in ["messages", "vs", "stats"]:
+for k in ["messages", "vs", "stats", "job"]:
     if k not in st.session_state:
-        st.session_state[k] = [] if k == "messages" else None if k == "vs" else {}
+        st.session_state[k] = [] if k == "messages" else None if k in ("vs", "job") else {}
+st.session_state.setdefault("last_api_call", float("-inf"))
 
 # ---------- UPLOADER ----------
 uploaded = st.file_uploader(
@@ -149,19 +353,32 @@ uploaded = st.file_uploader(
     help="Drag & drop or click to select a PDF (max 200 MB)",
 )
 
+# a job belongs to one upload: drop it if that file was removed or replaced
+if st.session_state.job is not None and (uploaded is None or st.session_state.job["file_id"] != uploaded.file_id):
+    st.session_state.job = None
+
 if uploaded and st.session_state.vs is None:
-    with st.spinner("Parsing & embedding…"):
-        raw_text, pages = parse_pdf(uploaded)
-        vs, chunks = build_vectorstore(raw_text)
-        st.session_state.vs = vs
-        st.session_state.stats = {"pages": pages, "chunks": chunks}
-    st.success("✅ PDF indexed successfully!")
+    if st.session_state.job is None:
+        st.session_state.job = start_indexing(uploaded)
+    job = st.session_state.job
+    if not job["done"].is_set():
+        indexing_progress()
+    elif job["error"] is not None:
+        st.error(f"⚠️ Indexing failed: {job['error']}")
+        if st.button("🔄 Retry"):
+            st.session_state.job = None
+            st.rerun()
+    else:
+        st.session_state.vs = job["vs"]
+        st.session_state.stats = job["stats"]
+        st.session_state.job = None
+        st.success("✅ PDF indexed successfully!")
 
 # ---------- METRICS ----------
 if st.session_state.vs:
     c1, c2, c3 = st.columns(3)
     c1.markdown(f'<span class="neon-metric">Pages: {st.session_state.stats["pages"]}</span>', unsafe_allow_html=True)
-    c2.markdown(f'<span class="neon-metric">Chunks: {st.session_state.stats["chunks"]}</span>', unsafe_allow_html=True)
+    c2.markdown(f'<span class="neon-metric">Search chunks (256 chars): {st.session_state.stats["chunks"]}</span>', unsafe_allow_html=True)
     if c3.button("🗑️  Clear chat"):
         st.session_state.messages = []
         st.rerun()
@@ -177,40 +394,57 @@ for msg in st.session_state.messages:
 # ---------- INPUT ----------
 if prompt := st.chat_input("Ask a question about the PDF"):
     if st.session_state.vs is None:
-        st.warning("Please upload a PDF first.")
+        st.warning("Still indexing the PDF – one moment." if st.session_state.job else "Please upload a PDF first.")
         st.stop()
 
+    from openai import APIError
+    from chat_stream import stream_answer
+
+    # re-open the API connection in the background if the pooled one has likely expired; never joined,
+    # so a turn is never slower than without it – it just hides the handshake behind retrieval + prompt build
+    if time.monotonic() - st.session_state.last_api_call > KEEPALIVE_S:
+        threading.Thread(target=warm_connection, args=(get_http_client(),), daemon=True).start()
+
     # user bubble
     st.session_state.messages.append({"role": "user", "content": prompt})
     st.markdown(f'<div class="user-bubble">{prompt}</div>', unsafe_allow_html=True)
 
     # retrieval
-    docs = st.session_state.vs.similarity_search(prompt, k=3)
-    context = "\n\n".join(d.page_content for d in docs)
+    # fetch 20 nearest children, keep 6 that are relevant but not near-duplicates of each other
+    docs = st.session_state.vs.max_marginal_relevance_search(prompt, k=6, fetch_k=20, lambda_mult=0.5)
+    # children → their parent chunks, deduped, best-ranked first
+    contexts = list({d.metadata["parent_id"]: d.metadata["parent"] for d in docs}.values())[:3]
 
     system = (
         "You are a helpful assistant. Answer the question using ONLY the context below. "
         "If the context does not contain the answer, say 'I don't know'."
     )
-    qa_prompt = f"Context:\n{context}\n\nQuestion:\n{prompt}"
+    # single buffer for context + question (no intermediate joined strings)
+    buf = io.StringIO()
+    buf.write("Context:\n")
+    for i, text in enumerate(contexts):
+        if i:
+            buf.write("\n\n")
+        buf.write(text)
+    buf.write("\n\nQuestion:\n")
+    buf.write(prompt)
+    qa_prompt = buf.getvalue()
 
     # assistant bubble (with typing indicator)
     with st.empty():
         st.markdown('<div class="bot-bubble">▌</div>', unsafe_allow_html=True)
         time.sleep(0.2)
 
-    client = OpenAI(api_key=openai_key, base_url="https://api.chatanywhere.tech/v1")
     with st.empty():
-        stream = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "system", "content": system},
-                      {"role": "user", "content": qa_prompt}],
-            stream=True,
-        )
-        full = st.write_stream(
-            (chunk.choices[0].delta.content or "")
-            for chunk in stream
-            if chunk.choices and len(chunk.choices) > 0 and chunk.choices[0].delta
-        )
+        try:
+            full = st.write_stream(stream_answer(
+                get_client(),
+                [{"role": "system", "content": system},
+                 {"role": "user", "content": qa_prompt}],
+            ))
+        except APIError as e:
+            st.error(f"⚠️ The chat API returned an error: {e.message}")
+            st.stop()
         st.markdown(f'<div class="bot-bubble">{full}</div>', unsafe_allow_html=True)
         st.session_state.messages.append({"role": "assistant", "content": full})
+        st.session_state.last_api_call = time.monotonic()
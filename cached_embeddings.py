@@ -0,0 +1,30 @@
+"""
+Shared LangChain `Embeddings` base for the MiniLM backends.
+Subclasses implement `encode(texts, batch_size=None)` → float32 ndarray; query embeddings are LRU-cached per instance.
+"""
+import abc
+import functools
+
+from langchain_core.embeddings import Embeddings
+
+QUERY_CACHE_SIZE = 512
+
+
+class CachedQueryEmbeddings(Embeddings):
+    @abc.abstractmethod
+    def encode(self, texts, batch_size=None):
+        ...
+
+    def embed_documents(self, texts):
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text):
+        # repeated questions skip the model forward pass; the cache lives on the instance (no class-level
+        # lru_cache holding `self`), and callers get a copy so they can't mutate it
+        cache = self.__dict__.get("_query_cache")
+        if cache is None:
+            cache = self._query_cache = functools.lru_cache(maxsize=QUERY_CACHE_SIZE)(self._embed_query_uncached)
+        return list(cache(text))
+
+    def _embed_query_uncached(self, text):
+        return tuple(self.encode([text])[0].tolist())
@@ -0,0 +1,39 @@
+"""
+Streaming chat answers from raw SSE lines.
+Parsed with orjson instead of building a pydantic ChatCompletionChunk per token; kept out of app.py so it can be tested.
+"""
+import orjson
+from openai import APIError
+
+
+def iter_deltas(response):
+    # response: anything with iter_lines() and http_request (the SDK's with_streaming_response object)
+    for line in response.iter_lines():
+        if not line.startswith("data:"):
+            continue
+        payload = line[len("data:"):].removeprefix(" ")  # SSE: one optional space after the colon
+        if payload == "[DONE]":
+            break
+        try:
+            event = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            continue  # keep-alive / malformed line from a proxy – not worth killing the answer
+        if not isinstance(event, dict):
+            continue
+        if event.get("error"):
+            # same as the SDK's Stream: an in-stream error becomes an APIError, not a blank answer
+            error = event["error"]
+            message = error.get("message") if isinstance(error, dict) else str(error)
+            raise APIError(message or "An error occurred during streaming", response.http_request, body=error)
+        choices = event.get("choices")
+        if choices and choices[0].get("delta"):
+            yield choices[0]["delta"].get("content") or ""
+
+
+def stream_answer(client, messages, model="gpt-3.5-turbo"):
+    with client.chat.completions.with_streaming_response.create(
+        model=model,
+        messages=messages,
+        stream=True,
+    ) as response:
+        yield from iter_deltas(response)
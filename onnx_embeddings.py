@@ -0,0 +1,61 @@
+"""
+all-MiniLM-L6-v2 on ONNX Runtime with dynamic INT8 quantization.
+Drop-in LangChain `Embeddings` replacement for HuggingFaceEmbeddings (~3-4× faster on CPU; INT8 weights give
+approximately the same vectors – typically cosine ≥ 0.99 to the FP32 model, so rankings rarely change).
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+from cached_embeddings import CachedQueryEmbeddings
+
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+EXPORT_DIR = Path(".onnx") / "all-MiniLM-L6-v2"
+MAX_LENGTH = 256  # same truncation as the sentence-transformers checkpoint
+
+
+def export_quantized(model_id=MODEL_ID, export_dir=EXPORT_DIR):
+    # one-off: export to ONNX + quantize weights to int8 (VNNI); later runs reuse the files on disk
+    quantized = export_dir / "model_quantized.onnx"
+    if quantized.exists():
+        return quantized
+
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    model = ORTModelForFeatureExtraction.from_pretrained(model_id, export=True)
+    model.save_pretrained(export_dir)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(export_dir)
+    quantizer = ORTQuantizer.from_pretrained(model)
+    quantizer.quantize(
+        save_dir=export_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False),
+    )
+    return quantized
+
+
+class OnnxMiniLMEmbeddings(CachedQueryEmbeddings):
+    def __init__(self, model_id=MODEL_ID, export_dir=EXPORT_DIR, batch_size=64, intra_op_threads=None):
+        path = export_quantized(model_id, export_dir)
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = intra_op_threads or os.cpu_count()
+        self.session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        self.batch_size = batch_size
+
+    def _encode(self, texts):
+        enc = self.tokenizer(texts, padding=True, truncation=True, max_length=MAX_LENGTH, return_tensors="np")
+        feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+        # mean pooling + L2 normalize, as in the sentence-transformers pipeline
+        mask = enc["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.linalg.norm(pooled, axis=1, keepdims=True)
+
+    def encode(self, texts, batch_size=None):
+        batch_size = batch_size or self.batch_size
+        return np.vstack([self._encode(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)])
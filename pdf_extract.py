@@ -0,0 +1,55 @@
+"""
+Parallel PyPDF2 text extraction.
+Lives outside app.py so worker processes can import it (Streamlit runs app.py as a script).
+"""
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+MIN_PAGES_PER_WORKER = 8  # below this, process start-up costs more than it saves
+# never plain fork: the caller is a thread inside a multithreaded server (ONNX Runtime / OpenMP pools),
+# and forking that can deadlock the children
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_reader = None  # per worker process, set once by _init_worker
+
+
+def _init_worker(data):
+    # the PDF bytes cross the pipe once per worker (not once per task) and are parsed once
+    global _reader
+    _reader = PdfReader(io.BytesIO(data))
+
+
+def extract_page_range(start, stop):
+    return [_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def count_pages(data):
+    return len(PdfReader(io.BytesIO(data)).pages)
+
+
+def iter_pages(data, max_workers=None):
+    # yields page texts in order as soon as each page range is extracted, so callers can start on early pages;
+    # max_workers caps the pool when other work (embedding) shares the cores
+    n_pages = count_pages(data)
+    workers = max(1, min(max_workers or os.cpu_count() or 1, n_pages // MIN_PAGES_PER_WORKER))
+    if workers == 1:
+        for page in PdfReader(io.BytesIO(data)).pages:
+            yield page.extract_text() or ""
+        return
+
+    # smaller ranges than one-per-worker so the first pages come back early
+    step = max(1, -(-n_pages // (workers * 4)))
+    starts = range(0, n_pages, step)
+    stops = [min(s + step, n_pages) for s in starts]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(START_METHOD),
+        initializer=_init_worker,
+        initargs=(data,),
+    ) as pool:
+        for part in pool.map(extract_page_range, starts, stops):
+            yield from part
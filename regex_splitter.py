@@ -0,0 +1,75 @@
+"""
+Single-pass drop-in for RecursiveCharacterTextSplitter.
+One regex scan finds every separator; chunks are then cut by bisecting the boundary lists,
+instead of re-splitting the text once per separator level.
+"""
+import re
+from bisect import bisect_left, bisect_right
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# highest priority first; "" = hard cut at chunk_size when no separator fits
+DEFAULT_SEPARATORS = ["\n\n", "\n", ". ", "  ", " ", ""]
+
+
+class RegexTextSplitter(RecursiveCharacterTextSplitter):
+    # Supported: chunk_size, chunk_overlap, separators, is_separator_regex, strip_whitespace.
+    # Lengths are always characters, and a separator stays at the end of the chunk it closes
+    # (i.e. keep_separator="end") before whitespace is stripped.
+    def __init__(self, separators=None, **kwargs):
+        length_function = kwargs.get("length_function", len)
+        if length_function is not len:
+            raise ValueError("RegexTextSplitter measures chunks in characters; length_function is not supported")
+        super().__init__(separators=separators or DEFAULT_SEPARATORS, **kwargs)
+
+        # one outer group per separator; a match's lastindex is the outer group (it closes last),
+        # even if a regex separator has groups of its own
+        parts, self._rank_of_group = [], {}
+        group = 1
+        for rank, sep in enumerate(s for s in self._separators if s):
+            pattern = sep if self._is_separator_regex else re.escape(sep)
+            parts.append(f"({pattern})")
+            self._rank_of_group[group] = rank
+            group += 1 + re.compile(pattern).groups
+        self._pattern = re.compile("|".join(parts)) if parts else None
+
+    def split_text(self, text):
+        size, overlap = self._chunk_size, self._chunk_overlap
+        by_rank = [[] for _ in self._rank_of_group]
+        cuts = []
+        if self._pattern is not None:
+            for m in self._pattern.finditer(text):
+                if m.end() > m.start():
+                    by_rank[self._rank_of_group[m.lastindex]].append(m.end())
+                    cuts.append(m.end())
+
+        chunks, start, n = [], 0, len(text)
+        while start < n:
+            if n - start <= size:
+                end, hard = n, False
+            else:
+                end, hard = self._best_cut(by_rank, start + overlap, start + size)
+            chunk = text[start:end]
+            if self._strip_whitespace:
+                chunk = chunk.strip()
+            if chunk:
+                chunks.append(chunk)
+            if end >= n:
+                break
+            # next window starts at the first separator within the trailing `overlap` chars;
+            # without one, a hard cut still overlaps by exactly `overlap`
+            i = bisect_left(cuts, end - overlap)
+            if i < len(cuts) and cuts[i] < end:
+                start = cuts[i]
+            else:
+                start = end - overlap if hard else end
+        return chunks
+
+    @staticmethod
+    def _best_cut(by_rank, lo, hi):
+        # latest boundary in (lo, hi] of the highest-priority separator that has one; hard cut otherwise
+        for positions in by_rank:
+            i = bisect_right(positions, hi)
+            if i and positions[i - 1] > lo:
+                return positions[i - 1], False
+        return hi, True
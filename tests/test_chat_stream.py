@@ -0,0 +1,48 @@
+import orjson
+import pytest
+from openai import APIError
+
+from chat_stream import iter_deltas
+
+
+class FakeResponse:
+    http_request = None
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+
+def delta(content):
+    return orjson.dumps({"choices": [{"delta": {"content": content}}]}).decode()
+
+
+def test_data_prefix_with_and_without_space():
+    lines = [f"data: {delta('Hello')}", f"data:{delta(', world')}"]
+    assert list(iter_deltas(FakeResponse(lines))) == ["Hello", ", world"]
+
+
+def test_stops_at_done():
+    lines = [f"data: {delta('a')}", "data: [DONE]", f"data: {delta('b')}"]
+    assert list(iter_deltas(FakeResponse(lines))) == ["a"]
+
+
+def test_skips_comments_blank_and_non_object_lines():
+    lines = ["", ": keep-alive", "event: ping", "data: not json", "data: [1, 2]", "data: 42", f"data: {delta('x')}"]
+    assert list(iter_deltas(FakeResponse(lines))) == ["x"]
+
+
+def test_empty_choices_and_null_content():
+    lines = ['data: {"choices": []}', 'data: {"choices": [{"delta": {"content": null}}]}', f"data: {delta('y')}"]
+    assert list(iter_deltas(FakeResponse(lines))) == ["", "y"]
+
+
+@pytest.mark.parametrize("error", [{"message": "quota exceeded"}, "quota exceeded"])
+def test_in_stream_error_raises_api_error(error):
+    lines = [f"data: {delta('partial')}", "data: " + orjson.dumps({"error": error}).decode()]
+    stream = iter_deltas(FakeResponse(lines))
+    assert next(stream) == "partial"
+    with pytest.raises(APIError, match="quota exceeded"):
+        next(stream)
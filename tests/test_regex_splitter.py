@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from regex_splitter import RegexTextSplitter
+
+
+def overlap(a, b):
+    # longest suffix of a that is a prefix of b
+    return max((k for k in range(1, min(len(a), len(b)) + 1) if a.endswith(b[:k])), default=0)
+
+
+def sample_text(seed, n_words=3000):
+    rng = random.Random(seed)
+    seps = [" "] * 12 + [". ", "\n", "\n\n"]
+    return "".join(f"w{i}{rng.choice(seps)}" for i in range(n_words))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_chunks_respect_size_and_overlap(seed):
+    chunks = RegexTextSplitter(chunk_size=1000, chunk_overlap=200).split_text(sample_text(seed))
+    assert len(chunks) > 1
+    assert all(len(c) <= 1000 for c in chunks)
+    assert all(overlap(a, b) <= 200 for a, b in zip(chunks, chunks[1:]))
+
+
+def test_every_word_is_kept():
+    text = sample_text(0)
+    chunks = RegexTextSplitter(chunk_size=256, chunk_overlap=32).split_text(text)
+    assert set(text.split()) == {w for c in chunks for w in c.split()}
+
+
+@pytest.mark.parametrize("text", ["", "   ", "\n\n \n"])
+def test_empty_or_whitespace_gives_no_chunks(text):
+    assert RegexTextSplitter(chunk_size=1000, chunk_overlap=200).split_text(text) == []
+
+
+def test_hard_cut_without_separators_still_overlaps():
+    chunks = RegexTextSplitter(chunk_size=1000, chunk_overlap=200).split_text("a" * 2500)
+    assert [len(c) for c in chunks] == [1000, 1000, 900]
+
+
+def test_prefers_paragraph_breaks():
+    text = "x " * 300 + "\n\n" + "y " * 300
+    chunks = RegexTextSplitter(chunk_size=1000, chunk_overlap=200).split_text(text)
+    assert chunks[0] == ("x " * 300).strip()
+
+
+def test_custom_separators():
+    chunks = RegexTextSplitter(separators=["|"], chunk_size=10, chunk_overlap=0).split_text("aaaa|bbbb|cccc")
+    assert chunks == ["aaaa|bbbb|", "cccc"]
+
+
+def test_rejects_non_character_length_function():
+    with pytest.raises(ValueError):
+        RegexTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=lambda s: len(s.split()))
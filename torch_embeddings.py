@@ -0,0 +1,40 @@
+"""
+all-MiniLM-L6-v2 in FP16 on CUDA with fused SDPA (FlashAttention) + torch.compile (dynamic shapes).
+GPU counterpart of onnx_embeddings.OnnxMiniLMEmbeddings; FP16 only pays off on GPU.
+"""
+import os
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+from cached_embeddings import CachedQueryEmbeddings
+
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+
+# module scope on purpose: Streamlit re-runs app.py, but this runs once per process
+# (set_num_interop_threads raises if called after torch has started parallel work)
+torch.set_num_threads(os.cpu_count())
+torch.set_num_interop_threads(2)
+
+
+class TorchMiniLMEmbeddings(CachedQueryEmbeddings):
+    def __init__(self, model_id=MODEL_ID, batch_size=64):
+        torch.backends.cuda.enable_flash_sdp(True)
+        self.model = SentenceTransformer(model_id, device="cuda", model_kwargs={"attn_implementation": "sdpa"})
+        self.model.half()
+        # compile the transformer itself – SentenceTransformer.encode never goes through a compiled wrapper's forward.
+        # dynamic shapes, no CUDA graphs: every batch pads to its own length/size, so shape-specialised graphs
+        # ("reduce-overhead") would re-record per shape and per calling thread
+        transformer = self.model[0]
+        transformer.auto_model = torch.compile(transformer.auto_model, dynamic=True)
+        self.batch_size = batch_size
+
+    def encode(self, texts, batch_size=None):
+        embs = self.model.encode(
+            texts,
+            batch_size=batch_size or self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+        return embs.astype(np.float32)